@@ -1,19 +1,113 @@
 """Gemini AI integration for strategy analysis."""
 
 import os
-import json
 import re
-from typing import Dict, Optional
-import google.generativeai as genai
+import math
+import numbers
+import sys
+import logging
+import hashlib
+import asyncio
+import functools
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import diskcache
+import orjson
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime (see _initialize_gemini_client)
+    import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+
+# RESPONSE CACHE SETTINGS
+_RESPONSE_CACHE_DIR = "./.gemini_cache"
+_RESPONSE_CACHE_TTL_SECONDS = 86400
+_response_cache: Optional[diskcache.Cache] = None
+
+# OUTPUT BUDGET PER MODE
+# Sized to each prompt's target length. Gemini 2.5 counts thinking tokens
+# against this limit, so the caps leave headroom above the visible answer.
+_MAX_OUTPUT_TOKENS: Dict[str, int] = {
+    "quick": 1500,
+    "detailed": 3000
+}
+
+# PROMPT SIZE LIMIT
+# Rough heuristic: ~4 characters per token for English text and JSON
+_CHARS_PER_TOKEN = 4
+_MAX_PROMPT_TOKENS = 30_000
+
+# TOKEN USAGE (per session)
+_USAGE_FIELDS = (
+    "prompt_token_count",
+    "cached_content_token_count",
+    "candidates_token_count"
+)
+_session_usage: Dict[str, int] = {"api_calls": 0, **{field: 0 for field in _USAGE_FIELDS}}
 
 
 # CONFIGURATION & INITIALIZATION
+_INITIALIZED = False
+# google.generativeai (grpc, protobuf, auth) is imported on first API use, so
+# prompt building and output formatting do not pay its import cost.
+_genai = None
+# Long-lived loop for batch calls: the SDK's async gRPC channel is bound to
+# the loop it was created on, so reusing the loop reuses the connection.
+_batch_event_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
 def _initialize_gemini_client() -> None:
-    """Initializes Gemini API client from environment variable."""
+    """Initializes Gemini API client from environment variable (once per process)."""
+    global _INITIALIZED, _genai
+    if _INITIALIZED:
+        return
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY environment variable not found.")
+    # genai keeps one client (one HTTP/2 gRPC channel) per service for the whole
+    # process. transport is left unset: pinning "grpc" would also hand the async
+    # client a sync transport, while the default picks grpc_asyncio for it.
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
+    _genai = genai
+    _INITIALIZED = True
+
+
+def _get_batch_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the event loop shared by all batch runs in this process."""
+    global _batch_event_loop
+    if _batch_event_loop is None or _batch_event_loop.is_closed():
+        _batch_event_loop = asyncio.new_event_loop()
+    return _batch_event_loop
+
+
+# SERIALIZATION
+_ORJSON_COMPACT = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+_ORJSON_PRETTY = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _label_non_finite(data: Any) -> Any:
+    """Replaces NaN/inf with explicit strings, which orjson would emit as null.
+
+    An infinite Sortino ratio (no downside days) must not look like a missing
+    value to the model, so the stdlib json token names are kept as strings.
+    """
+    if isinstance(data, dict):
+        return {key: _label_non_finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_label_non_finite(value) for value in data]
+    if isinstance(data, numbers.Real) and not math.isfinite(data):
+        if math.isnan(data):
+            return "NaN"
+        return "Infinity" if data > 0 else "-Infinity"
+    return data
+
+
+def _compact_json(data: Dict) -> str:
+    """Serializes data as deterministic, whitespace-free JSON."""
+    return orjson.dumps(_label_non_finite(data), option=_ORJSON_COMPACT).decode()
 
 
 # STRUCTURED DATA PREPARATION
@@ -41,120 +135,337 @@ def _build_comparison_payload(
     return comparison_data
 
 
+@dataclass(frozen=True)
+class AnalysisRequest:
+    """Comparison payload for one strategy pair, serialized once and reused."""
+    payload: Dict
+    compact_json: str
+
+    @functools.cached_property
+    def pretty_json(self) -> str:
+        """Indented JSON for human-readable logs (built on first use)."""
+        return orjson.dumps(_label_non_finite(self.payload), option=_ORJSON_PRETTY).decode()
+
+
+def make_analysis_request(
+    strategy_30: Dict[str, float],
+    strategy_90: Dict[str, float]
+) -> AnalysisRequest:
+    """Builds the comparison payload for two strategies and its compact JSON."""
+    payload = _build_comparison_payload(strategy_30, strategy_90)
+    return AnalysisRequest(payload=payload, compact_json=_compact_json(payload))
+
+
+def _resolve_request(
+    strategy_30: Optional[Dict[str, float]],
+    strategy_90: Optional[Dict[str, float]],
+    request: Optional[AnalysisRequest]
+) -> AnalysisRequest:
+    """Returns `request`, or builds one from the two strategies; exactly one source is allowed."""
+    if request is not None:
+        if strategy_30 is not None or strategy_90 is not None:
+            raise ValueError("Pass either strategy_30/strategy_90 or request, not both")
+        return request
+    if strategy_30 is None or strategy_90 is None:
+        raise ValueError("strategy_30 and strategy_90 are required when no request is given")
+    return make_analysis_request(strategy_30, strategy_90)
+
+
+# RESPONSE CACHING
+def _get_response_cache() -> diskcache.Cache:
+    """Opens the on-disk response cache on first use."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = diskcache.Cache(_RESPONSE_CACHE_DIR)
+    return _response_cache
+
+
+def _response_cache_key(
+    request: AnalysisRequest,
+    mode: str,
+    model_name: str,
+    temperature: float
+) -> str:
+    """Builds a deterministic cache key for one analysis request.
+
+    The key covers the full prompt text and generation config, not just the
+    metrics, so editing a prompt or an output cap invalidates stale answers.
+    """
+    key_material = "|".join([
+        _build_prompt_cached(request.compact_json, mode),
+        mode,
+        model_name,
+        _compact_json(_build_generation_config(temperature, mode))
+    ])
+    return hashlib.blake2b(key_material.encode()).hexdigest()
+
+
 # STRUCTURED PROMPT ENGINEERING (MODE-BASED)
+# Every prompt is _COMMON_PREFIX + mode sections + metrics JSON. The prefix is
+# identical for all modes and the JSON comes last, so quick and detailed calls
+# share one cacheable prompt prefix.
+_COMMON_PREFIX = """You are a quantitative portfolio analyst evaluating two momentum strategies.
+Analyze ONLY the JSON metrics provided (as compact JSON) at the end of this prompt.
+
+GENERAL CONSTRAINTS:
+- Use percentages when referring to metrics.
+- Ground every claim directly in the provided JSON data; reason ONLY from it.
+- Maintain professional fintech analyst tone."""
+
+_MODE_SECTIONS: Dict[str, str] = {
+    "quick": """Return a concise analysis with ONLY 5 bullet insights:
+WINNER:
+- Which strategy performs better overall?
+
+KEY DIFFERENCE:
+- What is the most significant performance gap?
+
+RISK NOTE:
+- What is the main risk trade-off?
+
+ONE IMPROVEMENT IDEA:
+- Suggest a single realistic enhancement.
+
+TONE:
+- Maximum 5 bullets total.
+- Be concise and business-readable.
+- No long essays.""",
+
+    "detailed": """Return your analysis in the following structured sections:
+
+PERFORMANCE COMPARISON:
+- Compare returns, CAGR, and risk-adjusted metrics across both strategies.
+- Use specific values from the JSON data.
+
+RISK VS RETURN ANALYSIS:
+- Explain the efficiency frontier positions.
+- Discuss drawdown, volatility, and Sharpe ratio trade-offs.
+- Determine which strategy offers better risk-adjusted returns.
+
+WHEN EACH STRATEGY OUTPERFORMS:
+- Describe market conditions where the 30-day strategy excels.
+- Describe market conditions where the 90-day strategy excels.
+- Specify risk tolerance scenarios.
+
+IMPROVEMENT SUGGESTION:
+- Propose ONE actionable enhancement to the underperforming strategy.
+- Explain how it would improve the metrics.
+- Be concrete and implementable.
+
+STYLE CONSTRAINTS:
+- Allow depth but avoid unnecessary length.
+- Quantify all comparisons with actual numbers, not vague language."""
+}
+
+
+def _validate_mode(mode: str) -> None:
+    """Raises ValueError unless `mode` has prompt sections defined."""
+    if mode not in _MODE_SECTIONS:
+        modes = " or ".join(f"'{name}'" for name in _MODE_SECTIONS)
+        raise ValueError(f"Mode must be {modes}, got '{mode}'")
+
+
+@functools.lru_cache(maxsize=64)
+def _build_prompt_parts(metrics_json: str, mode: str = "quick") -> Tuple[str, str]:
+    """Returns the shared prompt prefix and the mode sections + metrics suffix."""
+    _validate_mode(mode)
+
+    mode_prompt = (
+        f"{_MODE_SECTIONS[mode]}\n\n"
+        f"STRATEGY METRICS (JSON):\n{metrics_json}\n\nBegin analysis:"
+    )
+
+    return _COMMON_PREFIX, mode_prompt
+
+
+@functools.lru_cache(maxsize=64)
+def _build_prompt_cached(metrics_json: str, mode: str) -> str:
+    """Joins the prompt parts for an already-serialized payload (memoized)."""
+    common_prefix, mode_prompt = _build_prompt_parts(metrics_json, mode)
+    return f"{common_prefix}\n\n{mode_prompt}"
+
+
+def _check_prompt_size(request: AnalysisRequest, mode: str) -> None:
+    """Rejects prompts whose estimated size exceeds _MAX_PROMPT_TOKENS before upload."""
+    common_prefix, mode_prompt = _build_prompt_parts(request.compact_json, mode)
+    estimated_tokens = (len(common_prefix) + len(mode_prompt)) // _CHARS_PER_TOKEN
+    if estimated_tokens > _MAX_PROMPT_TOKENS:
+        raise ValueError(
+            f"Analysis prompt is too large (~{estimated_tokens} tokens, limit "
+            f"{_MAX_PROMPT_TOKENS}). Pass summary metrics, not per-day series."
+        )
+
+
 def build_prompt(comparison_data: dict, mode: str = "quick") -> str:
     """Builds a mode-based prompt for Gemini API analysis from metrics."""
-    metrics_json = json.dumps(comparison_data, indent=2)
-
-    if mode == "quick":
-        prompt = f"""
-        You are a quantitative portfolio analyst evaluating two momentum strategies.
-        Analyze ONLY the provided JSON metrics below.
-        STRATEGY METRICS (JSON):
-        {metrics_json}
-
-        Return a concise analysis with ONLY 5 bullet insights:
-        WINNER:
-        - Which strategy performs better overall?
-
-        KEY DIFFERENCE:
-        - What is the most significant performance gap?
-
-        RISK NOTE:
-        - What is the main risk trade-off?
-
-        ONE IMPROVEMENT IDEA:
-        - Suggest a single realistic enhancement.
-
-        TONE:
-        - Use percentages for metrics.
-        - Maximum 5 bullets total.
-        - Be concise and business-readable.
-        - No long essays.
-        - Reason ONLY from provided JSON.
-        - Maintain professional fintech analyst tone."""
-
-    elif mode == "detailed":
-        prompt = f"""You are a quantitative portfolio analyst evaluating two momentum strategies.
-
-        Analyze ONLY the provided JSON metrics below.
-
-        STRATEGY METRICS (JSON):
-        {metrics_json}
-
-        Return your analysis in the following structured sections:
-
-        PERFORMANCE COMPARISON:
-        - Compare returns, CAGR, and risk-adjusted metrics across both strategies.
-        - Use specific values from the JSON data.
-
-        RISK VS RETURN ANALYSIS:
-        - Explain the efficiency frontier positions.
-        - Discuss drawdown, volatility, and Sharpe ratio trade-offs.
-        - Determine which strategy offers better risk-adjusted returns.
-
-        WHEN EACH STRATEGY OUTPERFORMS:
-        - Describe market conditions where the 30-day strategy excels.
-        - Describe market conditions where the 90-day strategy excels.
-        - Specify risk tolerance scenarios.
-
-        IMPROVEMENT SUGGESTION:
-        - Propose ONE actionable enhancement to the underperforming strategy.
-        - Explain how it would improve the metrics.
-        - Be concrete and implementable.
-
-        STYLE CONSTRAINTS:
-        - Use percentages when referring to metrics.
-        - Ground every claim directly in the provided JSON data.
-        - Maintain professional fintech analyst tone.
-        - Allow depth but avoid unnecessary length.
-        - Quantify all comparisons with actual numbers, not vague language."""
-    
-    else:
-        raise ValueError(f"Mode must be 'quick' or 'detailed', got '{mode}'")
+    return _build_prompt_cached(_compact_json(comparison_data), mode)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_model(
+    model_name: str,
+    mode: str,
+    temperature: float
+) -> "genai.GenerativeModel":
+    """Returns a reusable model configured for the mode."""
+    return _genai.GenerativeModel(
+        model_name=model_name,
+        generation_config=_build_generation_config(temperature, mode)
+    )
+
+
+# GEMINI REQUEST HELPERS
+def _build_generation_config(temperature: float, mode: str) -> Dict:
+    """Returns the Gemini generation settings used for strategy analysis."""
+    return {
+        "temperature": temperature,
+        "top_p": 0.9,
+        "top_k": 40,
+        "max_output_tokens": _MAX_OUTPUT_TOKENS[mode]
+    }
+
+
+def _prompt_contents(request: AnalysisRequest, mode: str) -> List[str]:
+    """Returns generate_content input as [common prefix, mode sections + metrics]."""
+    # Sent as two parts so the shared prefix stays stable across modes and calls,
+    # letting Gemini's implicit prefix caching reuse it
+    return list(_build_prompt_parts(request.compact_json, mode))
+
+
+def _generate_content(
+    request: AnalysisRequest,
+    mode: str,
+    model_name: str,
+    temperature: float,
+    stream: bool = False
+):
+    """Calls Gemini with the mode-based prompt."""
+    model = _get_model(model_name, mode, temperature)
+    return model.generate_content(_prompt_contents(request, mode), stream=stream)
+
+
+async def _generate_content_async(
+    request: AnalysisRequest,
+    mode: str,
+    model_name: str,
+    temperature: float
+):
+    """Async variant of _generate_content."""
+    model = _get_model(model_name, mode, temperature)
+    return await model.generate_content_async(_prompt_contents(request, mode))
+
+
+def _record_usage(response) -> Dict[str, int]:
+    """Extracts token counts from a response and adds them to the session totals."""
+    usage_metadata = getattr(response, "usage_metadata", None)
+    usage = {
+        field: int(getattr(usage_metadata, field, 0) or 0)
+        for field in _USAGE_FIELDS
+    }
+
+    _session_usage["api_calls"] += 1
+    for field, count in usage.items():
+        _session_usage[field] += count
+
+    logger.debug(
+        "Gemini usage: prompt=%d cached=%d candidates=%d",
+        usage["prompt_token_count"],
+        usage["cached_content_token_count"],
+        usage["candidates_token_count"]
+    )
+    return usage
+
+
+def get_session_usage() -> Dict[str, float]:
+    """Returns token usage summed over all Gemini calls in this process.
+
+    `cached_token_ratio` is the share of prompt tokens served from Gemini's
+    implicit prefix cache; use it to confirm prompt caching works.
+    """
+    totals: Dict[str, float] = dict(_session_usage)
+    prompt_tokens = totals["prompt_token_count"]
+    totals["cached_token_ratio"] = (
+        totals["cached_content_token_count"] / prompt_tokens if prompt_tokens else 0.0
+    )
+    return totals
+
+
+def _extract_response_text(
+    response,
+    cache_key: str,
+    use_cache: bool,
+    usage_out: Optional[Dict[str, int]] = None
+) -> str:
+    """Records token usage, stores the response in the cache and returns its text."""
+    usage = _record_usage(response)
+    if usage_out is not None:
+        usage_out.update(usage)
 
-    return prompt
+    if response and response.text:
+        if use_cache:
+            _get_response_cache().set(
+                cache_key, response.text, expire=_RESPONSE_CACHE_TTL_SECONDS
+            )
+        return response.text
+    else:
+        raise Exception("Gemini API returned empty response")
 
 
 # GEMINI API INTEGRATION
-def run_ai_analysis(
-    strategy_30: Dict[str, float],
-    strategy_90: Dict[str, float],
+def run_ai_analysis_stream(
+    strategy_30: Optional[Dict[str, float]] = None,
+    strategy_90: Optional[Dict[str, float]] = None,
     mode: str = "quick",
     model_name: str = "gemini-2.5-flash",
-    temperature: float = 0.3
-) -> str:
-    """Runs Gemini API analysis for two strategies and returns the result."""
+    temperature: float = 0.3,
+    use_cache: bool = True,
+    request: Optional[AnalysisRequest] = None,
+    usage_out: Optional[Dict[str, int]] = None
+) -> Iterator[str]:
+    """Runs Gemini API analysis for two strategies, yielding text as it is generated.
+
+    Pass a prebuilt `request` (see make_analysis_request) instead of
+    strategy_30/strategy_90 to reuse its serialized payload. If `usage_out`
+    is given, it receives the call's token counts once the stream ends (all zero
+    for a response-cache hit).
+    """
     
     # Validate mode parameter
-    if mode not in ["quick", "detailed"]:
-        raise ValueError(f"Mode must be 'quick' or 'detailed', got '{mode}'")
-
-    # STEP 1: Initialize API client (credentials from environment)
+    _validate_mode(mode)
+
+    # STEP 1: Build structured JSON payload (unless the caller already did)
+    request = _resolve_request(strategy_30, strategy_90, request)
+    _check_prompt_size(request, mode)
+
+    # STEP 2: Return a cached analysis of identical inputs, if any
+    cache_key = _response_cache_key(request, mode, model_name, temperature)
+    if use_cache:
+        cached_text = _get_response_cache().get(cache_key)
+        if cached_text:
+            if usage_out is not None:
+                usage_out.update({field: 0 for field in _USAGE_FIELDS})
+            yield cached_text
+            return
+
+    # STEP 3: Initialize API client (credentials from environment)
     try:
         _initialize_gemini_client()
     except ValueError as e:
         raise ValueError(f"AI Analysis initialization failed: {e}")
 
-    # STEP 2: Build structured JSON payload
-    comparison_payload = _build_comparison_payload(strategy_30, strategy_90)
-
-    # STEP 3: Create mode-based prompt
-    analysis_prompt = build_prompt(comparison_payload, mode)
-    
-    # STEP 4: Call Gemini API with structured input
+    # STEP 4: Stream Gemini output for the mode-based prompt (static header first)
     try:
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config={
-                "temperature": temperature,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 3500
-            }
+        response = _generate_content(
+            request, mode, model_name, temperature, stream=True
         )
-
-        response = model.generate_content(analysis_prompt)
+        for chunk in response:
+            try:
+                chunk_text = chunk.text
+            except ValueError:
+                # Chunks carrying only metadata (e.g. the final usage report)
+                continue
+            if chunk_text:
+                yield chunk_text
 
     except Exception as api_error:
         raise Exception(
@@ -162,77 +473,231 @@ def run_ai_analysis(
             "Check API key validity and rate limits."
         )
 
-    # STEP 5: Extract and return text response
-    if response and response.text:
-        return response.text
-    else:
-        raise Exception("Gemini API returned empty response")
+    # STEP 5: Validate and cache the complete response, recording token usage
+    _extract_response_text(response, cache_key, use_cache, usage_out)
+
+
+def run_ai_analysis(
+    strategy_30: Optional[Dict[str, float]] = None,
+    strategy_90: Optional[Dict[str, float]] = None,
+    mode: str = "quick",
+    model_name: str = "gemini-2.5-flash",
+    temperature: float = 0.3,
+    use_cache: bool = True,
+    request: Optional[AnalysisRequest] = None,
+    return_usage: bool = False
+) -> Union[str, Tuple[str, Dict[str, int]]]:
+    """Runs Gemini API analysis for two strategies and returns the result.
+
+    With `return_usage=True`, returns `(text, usage)` where usage holds the
+    prompt, cached-content and candidate token counts for this call.
+    """
+    usage: Dict[str, int] = {}
+    analysis_text = "".join(run_ai_analysis_stream(
+        strategy_30, strategy_90, mode, model_name, temperature, use_cache, request,
+        usage_out=usage
+    ))
+    if return_usage:
+        return analysis_text, usage
+    return analysis_text
+
+
+def run_ai_analysis_batch(
+    strategy_pairs: List[Tuple[Dict[str, float], Dict[str, float]]],
+    mode: str = "quick",
+    model_name: str = "gemini-2.5-flash",
+    temperature: float = 0.3,
+    use_cache: bool = True,
+    concurrency: int = 10,
+    batch_size: Optional[int] = None
+) -> List[str]:
+    """Runs Gemini analyses for many (strategy_30, strategy_90) pairs concurrently.
+
+    At most `concurrency` requests are in flight at once; `batch_size` limits how
+    many pairs are scheduled per wave (all at once by default). Results keep
+    input order.
+    """
+    loop = _get_batch_event_loop()
+    batch_task = loop.create_task(_run_ai_analysis_batch_async(
+        strategy_pairs, mode, model_name, temperature,
+        use_cache, concurrency, batch_size
+    ))
+    try:
+        return loop.run_until_complete(batch_task)
+    except BaseException:
+        # The loop outlives this call: never leave the run (or its requests)
+        # pending on it, or the next batch would resume and bill them
+        batch_task.cancel()
+        loop.run_until_complete(asyncio.gather(batch_task, return_exceptions=True))
+        raise
+
+
+async def _run_ai_analysis_batch_async(
+    strategy_pairs: List[Tuple[Dict[str, float], Dict[str, float]]],
+    mode: str,
+    model_name: str,
+    temperature: float,
+    use_cache: bool,
+    concurrency: int,
+    batch_size: Optional[int]
+) -> List[str]:
+    """Async implementation of run_ai_analysis_batch."""
+    _validate_mode(mode)
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    if batch_size is not None and batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
+    requests = [
+        make_analysis_request(strategy_30, strategy_90)
+        for strategy_30, strategy_90 in strategy_pairs
+    ]
+    for request in requests:
+        _check_prompt_size(request, mode)
+    cache_keys = [
+        _response_cache_key(request, mode, model_name, temperature)
+        for request in requests
+    ]
+
+    # Serve cache hits first; only misses go to the API
+    results: List[Optional[str]] = [None] * len(requests)
+    pending = []
+    for i, cache_key in enumerate(cache_keys):
+        cached_text = _get_response_cache().get(cache_key) if use_cache else None
+        if cached_text:
+            results[i] = cached_text
+        else:
+            pending.append(i)
+
+    if not pending:
+        return results
+
+    # Client and model are set up once and shared by every request
+    try:
+        _initialize_gemini_client()
+    except ValueError as e:
+        raise ValueError(f"AI Analysis initialization failed: {e}")
+    _get_model(model_name, mode, temperature)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _analyze_one(i: int) -> None:
+        async with semaphore:
+            try:
+                response = await _generate_content_async(
+                    requests[i], mode, model_name, temperature
+                )
+            except Exception as api_error:
+                raise Exception(
+                    f"Gemini API call failed: {api_error}. "
+                    "Check API key validity and rate limits."
+                )
+        results[i] = _extract_response_text(response, cache_keys[i], use_cache)
+
+    wave_size = batch_size or len(pending)
+    for start in range(0, len(pending), wave_size):
+        tasks = [
+            asyncio.ensure_future(_analyze_one(i))
+            for i in pending[start:start + wave_size]
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # On failure, cancel the rest of the wave and wait for them to finish
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    return results
 
 
 
 # OUTPUT FORMATTING (PRESENTATION LAYER)
-def format_analysis_output(analysis_text: str) -> str:
-    """Converts markdown analysis text to formatted plain text."""
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_HR = '─' * 70
+
+# One alternation per line kind, tried in priority order:
+# ## header | line containing **bold** | - bullet | whitespace-only line
+_LINE_RE = re.compile(
+    r'^(?:(##.*)|(.*\*\*.*)|([^\S\n]*-.*)|([^\S\n]+))$',
+    re.MULTILINE
+)
 
-    lines = analysis_text.split('\n')
-    formatted_lines = []
-
-    for line in lines:
-        # Handle ## Headers (main sections)
-        if line.startswith('##'):
-            header = line.replace('##', '').strip()
-            formatted_lines.append('')
-            formatted_lines.append('─' * 70)
-            formatted_lines.append(f"  ▶ {header.upper()}")
-            formatted_lines.append('─' * 70)
-            formatted_lines.append('')
-        
-        # Handle ### Sub-headers
-        elif line.startswith('###'):
-            subheader = line.replace('###', '').strip()
-            formatted_lines.append(f"\n  ◆ {subheader}")
-            formatted_lines.append('')
-        
-        # Handle **bold** text
-        elif '**' in line:
-            formatted_line = re.sub(r'\*\*(.*?)\*\*', r'>>> \1 <<<', line)
-            formatted_lines.append(formatted_line)
-        
-        # Handle bullet points
-        elif line.strip().startswith('-'):
-            formatted_lines.append(f"    • {line.strip()[1:].strip()}")
-
-        # Regular lines
-        else:
-            if line.strip():
-                formatted_lines.append(line)
-            else:
-                formatted_lines.append('')
 
-    return '\n'.join(formatted_lines)
+def _format_line(match: re.Match) -> str:
+    """Formats one markdown line matched by _LINE_RE."""
+    header, bold_line, bullet_line, _ = match.groups()
 
+    # Handle ## Headers (main sections)
+    if header is not None:
+        title = header.replace('##', '').strip().upper()
+        return f"\n{_HR}\n  ▶ {title}\n{_HR}\n"
 
-def print_analysis(analysis_text: str, strategy_name: str = "Strategy Comparison") -> None:
-    """Prints formatted AI analysis to stdout."""
+    # Handle **bold** text
+    if bold_line is not None:
+        return _BOLD_RE.sub(r'>>> \1 <<<', bold_line)
 
-    formatted_text = format_analysis_output(analysis_text)
+    # Handle bullet points
+    if bullet_line is not None:
+        return f"    • {bullet_line.strip()[1:].strip()}"
+
+    # Whitespace-only lines become empty lines
+    return ''
+
+
+def format_analysis_output(analysis_text: str) -> str:
+    """Converts markdown analysis text to formatted plain text."""
+    # Plain lines never match and pass through unchanged
+    return _LINE_RE.sub(_format_line, analysis_text)
+
+
+def print_analysis(
+    analysis: Union[str, Iterable[str]],
+    strategy_name: str = "Strategy Comparison"
+) -> None:
+    """Prints formatted AI analysis to stdout, writing streamed chunks as lines complete."""
+
+    chunks = [analysis] if isinstance(analysis, str) else analysis
     print("\n" + "="*80)
     print(f"{strategy_name.upper():^80}")
     print("="*80)
-    print(f"\n{formatted_text}\n")
+    sys.stdout.write("\n")
+
+    write_analysis_stream(chunks)
+    sys.stdout.write("\n")
     print("="*80 + "\n")
 
 
+def write_analysis_stream(chunks: Iterable[str]) -> str:
+    """Writes formatted analysis to stdout as lines complete; returns the raw text."""
+    received = []
+    # Formatting is line-based, so only complete lines are formatted and written
+    pending = ""
+    for chunk in chunks:
+        received.append(chunk)
+        pending += chunk
+        if "\n" in pending:
+            complete, pending = pending.rsplit("\n", 1)
+            sys.stdout.write(format_analysis_output(complete) + "\n")
+            sys.stdout.flush()
+
+    sys.stdout.write(format_analysis_output(pending) + "\n")
+    return "".join(received)
+
+
 # LOGGING & DEBUGGING
 def log_analysis_request(
-    strategy_30: Dict[str, float],
-    strategy_90: Dict[str, float],
-    output_file: Optional[str] = None
+    strategy_30: Optional[Dict[str, float]] = None,
+    strategy_90: Optional[Dict[str, float]] = None,
+    output_file: Optional[str] = None,
+    request: Optional[AnalysisRequest] = None
 ) -> None:
     
     """Logs the analysis request input metrics and payload."""
-    comparison_payload = _build_comparison_payload(strategy_30, strategy_90)
-    comparison_json_str = json.dumps(comparison_payload, indent=2)
+    # Pretty-printing the payload is the costly part; skip it when nothing would see it
+    if not output_file and not logger.isEnabledFor(logging.INFO):
+        return
+    request = _resolve_request(strategy_30, strategy_90, request)
+    comparison_json_str = request.pretty_json
 
     log_message = f"""
         [AI ANALYSIS REQUEST LOG]
@@ -243,7 +708,7 @@ def log_analysis_request(
         INPUT PAYLOAD:
         {comparison_json_str}
         """
-    print(log_message)
+    logger.info(log_message)
 
     if output_file:
         with open(output_file, 'w') as f:
@@ -1,82 +1,94 @@
+import logging
 import pandas as pd
 from typing import Optional
 
+logger = logging.getLogger(__name__)
 
-def load_data(path: str, output_path: Optional[str] = None) -> pd.DataFrame:
+
+def load_data(
+    path: str,
+    output_path: Optional[str] = None,
+    verbose: bool = False
+) -> pd.DataFrame:
     """
     This function performs the following operations:
-    1. Loads CSV with proper datetime parsing
+    1. Loads CSV with the PyArrow reader, parsing Date as datetime
     2. Sorts data chronologically
     3. Handles missing values using forward fill (financially realistic)
     4. Removes (if any) remaining NaN values
     5. Saves cleaned data to CSV
-    6. Provides diagnostics on data cleaning
+    6. Provides diagnostics on data cleaning (missing-value scans only when verbose)
     """
 
-    print("DATA LOADING AND CLEANING")
-    df = pd.read_csv(path)
-    if "Date" not in df.columns:
-        raise ValueError("CSV must contain a 'Date' column.")
-
+    logger.info("DATA LOADING AND CLEANING")
+    # PyArrow's multithreaded CSV reader; parse_dates handles ISO and non-ISO dates
+    # and leaves integer price columns with gaps to be read as float (NaN)
+    try:
+        df = pd.read_csv(path, engine="pyarrow", parse_dates=["Date"])
+    except KeyError:
+        raise ValueError("CSV must contain a 'Date' column.") from None
 
-    # Parse Date as datetime
-    df["Date"] = pd.to_datetime(df["Date"])
-    print(f"\n[LOAD] CSV loaded: {df.shape[0]} rows, {df.shape[1]} columns")
-    print(f"[LOAD] Date range: {df['Date'].min()} to {df['Date'].max()}")
+    # Diagnostics scan the Date column, so skip them entirely when INFO is off
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[LOAD] CSV loaded: %d rows, %d columns", df.shape[0], df.shape[1])
+        logger.info("[LOAD] Date range: %s to %s", df["Date"].min(), df["Date"].max())
 
 
-    # STEP B: Sort data chronologically and reset index
-    df = df.sort_values("Date").reset_index(drop=True)
-    print(f"[SORT] Data sorted chronologically by Date")
+    # STEP B: Sort data chronologically with a fresh 0..N-1 index
+    df = df.sort_values("Date", ignore_index=True)
+    logger.info("[SORT] Data sorted chronologically by Date")
 
 
     # STEP C: Report missing values BEFORE cleaning
-    print(f"\n[DIAGNOSTICS] Missing values BEFORE cleaning:")
-    missing_before = df.isnull().sum()
-    if missing_before.sum() > 0:
-        print(missing_before[missing_before > 0])
-    else:
-        print("None detected")
-
+    if verbose:
+        logger.info("[DIAGNOSTICS] Missing values BEFORE cleaning:")
+        missing_before = df.isnull().sum()
+        if missing_before.sum() > 0:
+            logger.info("%s", missing_before[missing_before > 0])
+        else:
+            logger.info("None detected")
 
-    # Forward fill: Assumes the most recent price holds until a new trade occurs
-    df = df.ffill()
-    print(f"\n[CLEAN] Forward fill applied to all columns")
 
-
-    # Drop remaining NaN values 
+    # STEP D: Forward fill (the most recent price holds until a new trade occurs),
+    # then drop rows still missing prices (before each asset's first quote)
     initial_rows = len(df)
-    df = df.dropna()
+    df = df.ffill().dropna(ignore_index=True)
+    logger.info("[CLEAN] Forward fill applied to all columns")
+
     dropped_rows = initial_rows - len(df)
     if dropped_rows > 0:
-        print(f"[CLEAN] Dropped {dropped_rows} row(s) with remaining NaN values")
+        logger.info("[CLEAN] Dropped %d row(s) with remaining NaN values", dropped_rows)
     else:
-        print(f"[CLEAN] No rows dropped after forward fill")
+        logger.info("[CLEAN] No rows dropped after forward fill")
 
 
     # STEP E: Final diagnostics
-    print(f"\n[DIAGNOSTICS] Missing values AFTER cleaning:")
-    missing_after = df.isnull().sum()
-    if missing_after.sum() > 0:
-        print(missing_after[missing_after > 0])
-    else:
-        print("None detected ✓")
-    print(f"\n[FINAL] Clean dataset shape: {df.shape[0]} rows, {df.shape[1]} columns")
-    print(f"[FINAL] Date range: {df['Date'].min()} to {df['Date'].max()}")
-    print(f"[FINAL] {len(df)} trading days available")
+    if verbose:
+        logger.info("[DIAGNOSTICS] Missing values AFTER cleaning:")
+        missing_after = df.isnull().sum()
+        if missing_after.sum() > 0:
+            logger.info("%s", missing_after[missing_after > 0])
+        else:
+            logger.info("None detected ✓")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[FINAL] Clean dataset shape: %d rows, %d columns", df.shape[0], df.shape[1])
+        logger.info("[FINAL] Date range: %s to %s", df["Date"].min(), df["Date"].max())
+    if verbose:
+        logger.info("[FINAL] %d trading days available", len(df))
 
 
     # Save cleaned data to CSV
     if output_path:
         df.to_csv(output_path, index=False)
-        print(f"[SAVE] Clean data saved to '{output_path}'")
+        logger.info("[SAVE] Clean data saved to '%s'", output_path)
 
-    return df.reset_index(drop=True)
+    return df
 
 
 if __name__ == "__main__":
     # Example usage
-    df = load_data(r"data\assets.csv", output_path=r"data\assets_clean.csv")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    df = load_data(r"data\assets.csv", output_path=r"data\assets_clean.csv", verbose=True)
     print("First 5 rows of clean data:")
     print(df.head())
     print("\nLast 5 rows of clean data:")
@@ -1,163 +1,180 @@
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning, module="google.generativeai")
 
+import sys
+import logging
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from data_loader import load_data
-from strategy_engine import compute_strategy
-from metrics import compute_metrics, compute_sharpe_ratio, compute_sortino_ratio
-from ai_analysis import run_ai_analysis, format_analysis_output
+from strategy_engine import compute_strategies, weights_from_idx
+from metrics import compute_all_metrics
+from ai_analysis import run_ai_analysis_stream, write_analysis_stream, format_analysis_output
 
 load_dotenv()
 
 
 def extract_monthly_performance(df, portfolio_value, weights):
+    asset_cols = weights.columns.tolist()
+    weight_cols = [f'{asset}_weight' for asset in asset_cols]
     results_df = pd.DataFrame({
         'Date': df['Date'].values,
-        'PortfolioValue': portfolio_value.values
+        'PortfolioValue': portfolio_value.values,
+        **dict(zip(weight_cols, weights.to_numpy().T))
     })
     
-    for col in weights.columns:
-        results_df[col] = weights[col].values
-    
-    results_df['YearMonth'] = results_df['Date'].dt.to_period('M')
-    monthly = results_df.groupby('YearMonth').agg({
-        'Date': 'last',
-        'PortfolioValue': 'last'
-    }).reset_index()
+    # One grouping pass takes the month-end row for every column at once,
+    # keyed by int64 months since 1970-01 rather than boxed Period objects
+    month_key = df['Date'].to_numpy().astype('datetime64[M]').view('int64')
+    monthly = results_df.groupby(month_key, sort=False).last()
+    # The same ordinals rebuild the Period labels on the (small) monthly frame
+    monthly['YearMonth'] = pd.PeriodIndex.from_ordinals(monthly.index, freq='M')
+    monthly = monthly.reset_index(drop=True)
     
+    pv = monthly['PortfolioValue'].to_numpy()
+    monthly_return = np.empty_like(pv)
+    monthly_return[:1] = (pv[:1] - 1) * 100
+    monthly_return[1:] = (pv[1:] / pv[:-1] - 1) * 100
     monthly['PrevValue'] = monthly['PortfolioValue'].shift(1)
-    monthly['MonthlyReturn'] = (monthly['PortfolioValue'] / monthly['PrevValue'] - 1) * 100
-    monthly.loc[0, 'MonthlyReturn'] = (monthly.loc[0, 'PortfolioValue'] - 1) * 100
-    asset_cols = weights.columns.tolist()
-    for asset in asset_cols:
-        monthly[f'{asset}_weight'] = results_df.groupby('YearMonth')[asset].last().values
+    monthly['MonthlyReturn'] = monthly_return
     
-    return monthly
+    return monthly[['YearMonth', 'Date', 'PortfolioValue', 'PrevValue', 'MonthlyReturn'] + weight_cols]
 
 
 def print_monthly_performance(strategy_name, monthly_df, weights_df):
-    print(f"\n{strategy_name}")
-    print("-" * 70)
     asset_cols = weights_df.columns.tolist()
     
     header = f"{'Month':<12} {'PortValue':<12} {'Return %':<12} {'Selected Assets':<50}"
-    print(header)
-    print("-" * 70)
+    lines = [f"\n{strategy_name}", "-" * 70, header, "-" * 70]
     
-    for idx, row in monthly_df.iterrows():
-        month_str = str(row['YearMonth'])
-        port_val = f"{row['PortfolioValue']:.4f}"
-        ret_pct = f"{row['MonthlyReturn']:.2f}%"
-        
-        selected = []
-        for asset in asset_cols:
-            weight_col = f'{asset}_weight'
-            if weight_col in row and row[weight_col] > 0.01:
-                selected.append(f"{asset} ({row[weight_col]:.1%})")
+    # Format each column once up front instead of boxing every row into a Series
+    held_assets = [asset for asset in asset_cols if f'{asset}_weight' in monthly_df]
+    weight_matrix = monthly_df[[f'{asset}_weight' for asset in held_assets]].to_numpy()
+    month_strs = monthly_df['YearMonth'].astype(str).to_numpy()
+    port_vals = np.char.mod('%.4f', monthly_df['PortfolioValue'].to_numpy())
+    ret_pcts = np.char.mod('%.2f%%', monthly_df['MonthlyReturn'].to_numpy())
+    
+    for month_str, port_val, ret_pct, row_weights in zip(month_strs, port_vals, ret_pcts, weight_matrix):
+        selected = [
+            f"{asset} ({weight:.1%})"
+            for asset, weight in zip(held_assets, row_weights)
+            if weight > 0.01
+        ]
         
         assets_str = ", ".join(selected) if selected else "Cash"
         
-        print(f"{month_str:<12} {port_val:<12} {ret_pct:<12} {assets_str:<50}")
+        lines.append(f"{month_str:<12} {port_val:<12} {ret_pct:<12} {assets_str:<50}")
     
-    print("-" * 70)
+    lines.append("-" * 70)
+    # Emit the whole table with a single write instead of one print per row
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+# Created once so repeated main() calls never stack duplicate handlers
+_MODULE_LOG_HANDLER = logging.StreamHandler(sys.stdout)
+_MODULE_LOG_HANDLER.setFormatter(logging.Formatter("%(message)s"))
+
+
+def _show_module_logs(*logger_names):
+    """Print this project's module INFO logs to stdout; root and library loggers stay untouched"""
+    for name in logger_names:
+        module_logger = logging.getLogger(name)
+        module_logger.setLevel(logging.INFO)
+        if _MODULE_LOG_HANDLER not in module_logger.handlers:
+            module_logger.addHandler(_MODULE_LOG_HANDLER)
+        module_logger.propagate = False
 
 
 def main():
     """Load data, execute momentum strategies, and run AI analysis"""
+    # Module diagnostics go through logging; show them inline with the report
+    _show_module_logs("data_loader", "ai_analysis")
 
     # STEP 1: DATA LOADING & CLEANING
     print("\n" + "-"*70)
     print("STEP 1: DATA LOADING & CLEANING\n")
     
-    df = load_data(r'data\assets.csv', output_path=r'data\assets_clean.csv')
-    print(f"✓ Data loaded and cleaned: {df.shape[0]} trading days, {df.shape[1]-1} assets")
+    df = load_data(r'data\assets.csv', output_path=r'data\assets_clean.csv', verbose=True)
+    print(f"\n✓ Data loaded and cleaned: {df.shape[0]} trading days, {df.shape[1]-1} assets")
     
     # STEP 2: MOMENTUM STRATEGY EXECUTION
     print("\n" + "-"*70)
     print("STEP 2: MOMENTUM STRATEGY EXECUTION\n")
 
-    df = pd.read_csv('data/assets_clean.csv')
-    df['Date'] = pd.to_datetime(df['Date'])
-
+    # Reuse the cleaned frame from STEP 1; Date is already parsed as datetime
     print(f"  Shape: {df.shape[0]} trading days, {df.shape[1] - 1} assets")
     print(f"  Date range: {df['Date'].min().date()} to {df['Date'].max().date()}")
     print(f"  Assets: {', '.join(df.columns[1:].tolist())}")
 
 
+    # Both lookbacks share the returns and rebalance schedule computed once
+    results = compute_strategies(df, lookback_periods=(30, 90))
+
     print("\nSTRATEGY A: 30-Day Momentum Lookback")
-    result_a = compute_strategy(df, lookback_days=30)
-    monthly_a = extract_monthly_performance(df, result_a['portfolio_value'], result_a['weights'])
+    result_a = results[30]
+    pv_a = result_a['portfolio_value'].to_numpy()
+    pr_a = result_a['portfolio_returns'].to_numpy()
+    final_a = pv_a[-1]
+    weights_a = weights_from_idx(result_a['weights_idx'], df.index, df.columns[1:].tolist())
+    monthly_a = extract_monthly_performance(df, result_a['portfolio_value'], weights_a)
 
     print(f"\n[EXECUTION] Strategy A completed successfully")
-    print(f"  Total trading days: {result_a['portfolio_returns'].shape[0]}")
+    print(f"  Total trading days: {pr_a.shape[0]}")
     print(f"  Total months: {len(monthly_a)}")
     print(f"\n[SUMMARY] Overall Portfolio Performance (30-day lookback):")
-    print(f"  Final portfolio value: {result_a['portfolio_value'].iloc[-1]:.4f}")
-    print(f"  Total return: {(result_a['portfolio_value'].iloc[-1] - 1) * 100:.2f}%")
-    print(f"  Mean daily return: {result_a['portfolio_returns'].mean() * 100:.4f}%")
-    print(f"  Std dev daily return: {result_a['portfolio_returns'].std() * 100:.4f}%")
+    print(f"  Final portfolio value: {final_a:.4f}")
+    print(f"  Total return: {(final_a - 1) * 100:.2f}%")
+    print(f"  Mean daily return: {pr_a.mean() * 100:.4f}%")
+    print(f"  Std dev daily return: {pr_a.std(ddof=1) * 100:.4f}%")
     print(f"\n[MONTHLY BREAKDOWN] Strategy A")
-    print_monthly_performance("30-Day Momentum Strategy", monthly_a, result_a['weights'])
+    print_monthly_performance("30-Day Momentum Strategy", monthly_a, weights_a)
 
 
     print("\nSTRATEGY B: 90-Day Momentum Lookback")
-    result_b = compute_strategy(df, lookback_days=90)
-    monthly_b = extract_monthly_performance(df, result_b['portfolio_value'], result_b['weights'])
+    result_b = results[90]
+    pv_b = result_b['portfolio_value'].to_numpy()
+    pr_b = result_b['portfolio_returns'].to_numpy()
+    final_b = pv_b[-1]
+    weights_b = weights_from_idx(result_b['weights_idx'], df.index, df.columns[1:].tolist())
+    monthly_b = extract_monthly_performance(df, result_b['portfolio_value'], weights_b)
 
     print(f"\n[EXECUTION] Strategy B completed successfully")
-    print(f"  Total trading days: {result_b['portfolio_returns'].shape[0]}")
+    print(f"  Total trading days: {pr_b.shape[0]}")
     print(f"  Total months: {len(monthly_b)}")
     print(f"\n[SUMMARY] Overall Portfolio Performance (90-day lookback):")
-    print(f"  Final portfolio value: {result_b['portfolio_value'].iloc[-1]:.4f}")
-    print(f"  Total return: {(result_b['portfolio_value'].iloc[-1] - 1) * 100:.2f}%")
-    print(f"  Mean daily return: {result_b['portfolio_returns'].mean() * 100:.4f}%")
-    print(f"  Std dev daily return: {result_b['portfolio_returns'].std() * 100:.4f}%")
+    print(f"  Final portfolio value: {final_b:.4f}")
+    print(f"  Total return: {(final_b - 1) * 100:.2f}%")
+    print(f"  Mean daily return: {pr_b.mean() * 100:.4f}%")
+    print(f"  Std dev daily return: {pr_b.std(ddof=1) * 100:.4f}%")
     print(f"\n[MONTHLY BREAKDOWN] Strategy B")
-    print_monthly_performance("90-Day Momentum Strategy", monthly_b, result_b['weights'])
+    print_monthly_performance("90-Day Momentum Strategy", monthly_b, weights_b)
 
     print("\nSTRATEGY COMPARISON")
     print(f"\nStrategy A (30-day) vs Strategy B (90-day):")
-    print(f"  Final Value (A): {result_a['portfolio_value'].iloc[-1]:.4f} vs (B): {result_b['portfolio_value'].iloc[-1]:.4f}")
-    print(f"  Total Return (A): {(result_a['portfolio_value'].iloc[-1] - 1) * 100:.2f}% vs (B): {(result_b['portfolio_value'].iloc[-1] - 1) * 100:.2f}%")
+    print(f"  Final Value (A): {final_a:.4f} vs (B): {final_b:.4f}")
+    print(f"  Total Return (A): {(final_a - 1) * 100:.2f}% vs (B): {(final_b - 1) * 100:.2f}%")
 
     # STEP 3: AI-POWERED ANALYSIS
     print("\n" + "-"*70)
     print("STEP 3: AI-POWERED STRATEGY ANALYSIS\n")
     
     try:
-        # Compute comprehensive metrics for Strategy A (30-day)
-        strategy_30_metrics = compute_metrics(
-            result_a['portfolio_returns'],
-            result_a['portfolio_value'],
-            trading_days_per_year=252
-        )
-        strategy_30_metrics['sharpe_ratio'] = compute_sharpe_ratio(
-            result_a['portfolio_returns'],
+        # Compute comprehensive metrics (core + Sharpe + Sortino) per strategy
+        strategy_30_metrics = compute_all_metrics(
+            pr_a,
+            pv_a,
             risk_free_rate=0.0,
-            trading_days_per_year=252
-        )
-        strategy_30_metrics['sortino_ratio'] = compute_sortino_ratio(
-            result_a['portfolio_returns'],
             target_return=0.0,
-            trading_days_per_year=252
+            trading_days_per_year=252,
+            max_drawdown=result_a['max_drawdown']
         )
-
-        # Compute comprehensive metrics for Strategy B (90-day)
-        strategy_90_metrics = compute_metrics(
-            result_b['portfolio_returns'],
-            result_b['portfolio_value'],
-            trading_days_per_year=252
-        )
-        strategy_90_metrics['sharpe_ratio'] = compute_sharpe_ratio(
-            result_b['portfolio_returns'],
+        strategy_90_metrics = compute_all_metrics(
+            pr_b,
+            pv_b,
             risk_free_rate=0.0,
-            trading_days_per_year=252
-        )
-        strategy_90_metrics['sortino_ratio'] = compute_sortino_ratio(
-            result_b['portfolio_returns'],
             target_return=0.0,
-            trading_days_per_year=252
+            trading_days_per_year=252,
+            max_drawdown=result_b['max_drawdown']
         )
 
         print("\n[INFO] Computed metrics for both strategies")
@@ -183,10 +200,12 @@ def main():
                 print("  Invalid input. Please enter 1 or 2.")
         
         print("\n[INFO] Calling Gemini API for strategy analysis...\n")
-        analysis_text = run_ai_analysis(strategy_30_metrics, strategy_90_metrics, mode=selected_mode)
+        # Print lines as they stream in; keep the full text for the saved copy
+        analysis_text = write_analysis_stream(
+            run_ai_analysis_stream(strategy_30_metrics, strategy_90_metrics, mode=selected_mode)
+        )
         
         formatted_analysis = format_analysis_output(analysis_text)
-        print(formatted_analysis)
         with open('ai_suggestion.txt', 'w', encoding='utf-8') as f:
             f.write(formatted_analysis + '\n')
 
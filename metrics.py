@@ -1,31 +1,57 @@
 """Portfolio performance metrics computation."""
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional, Tuple, Union
 
+ArrayLike = Union[pd.Series, np.ndarray]
 
-def compute_metrics(
-    portfolio_returns: pd.Series,
-    portfolio_value: pd.Series,
-    trading_days_per_year: int = 252
-) -> Dict[str, float]:
-    """Computes standard portfolio performance metrics."""
-    # Validate inputs
-    if portfolio_returns.empty or portfolio_value.empty:
+
+def _prep(returns: ArrayLike) -> np.ndarray:
+    """Returns the non-NaN values as a float64 ndarray (a view when nothing is missing)."""
+    arr = np.asarray(returns, dtype=np.float64)
+    nan_mask = np.isnan(arr)
+    return arr[~nan_mask] if nan_mask.any() else arr
+
+
+def compute_max_drawdown(values: ArrayLike) -> float:
+    """Computes the maximum drawdown, min(value / running peak - 1), in one scratch buffer."""
+    values = np.asarray(values, dtype=np.float64)
+    # fmax/nanmin skip missing values the same way pandas cummax/min do
+    drawdown = np.fmax.accumulate(values)
+    np.divide(values, drawdown, out=drawdown)
+    drawdown -= 1.0
+    return float(np.nanmin(drawdown))
+
+
+def _prep_inputs(
+    portfolio_returns: ArrayLike,
+    portfolio_value: ArrayLike
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Validates inputs and returns (non-NaN returns, values) as float64 arrays."""
+    if len(portfolio_returns) == 0 or len(portfolio_value) == 0:
         raise ValueError("portfolio_returns and portfolio_value cannot be empty")
 
 
-    returns = portfolio_returns.copy()
-    values = portfolio_value.copy()
-    returns = returns.dropna()
-    if returns.empty or values.empty:
+    returns = _prep(portfolio_returns)
+    values = np.asarray(portfolio_value, dtype=np.float64)
+    if returns.size == 0:
         raise ValueError("After dropping NaN values, series are empty")
 
+    return returns, values
+
 
+def _core_metrics(
+    returns: np.ndarray,
+    values: np.ndarray,
+    daily_volatility: float,
+    trading_days_per_year: int,
+    max_drawdown: Optional[float] = None
+) -> Dict[str, float]:
+    """Total return, CAGR, volatility and max drawdown from prepared arrays."""
     # 1. TOTAL RETURN
     # Total return = (Final Value / Initial Value) - 1
     # Since initial value is 1.0, this simplifies to: Final Value - 1
-    final_value = values.iloc[-1]
+    final_value = values[-1]
     total_return = final_value - 1.0
 
 
@@ -48,15 +74,14 @@ def compute_metrics(
     # Volatility = Daily Std Dev * sqrt(trading_days_per_year)
     # This annualizes the daily volatility using the square-root-of-time rule,
     # which assumes returns have zero autocorrelation (reasonable for equities).
-    daily_volatility = returns.std()
     volatility = daily_volatility * np.sqrt(trading_days_per_year)
 
     # 4. MAXIMUM DRAWDOWN
     # Maximum Drawdown = min(Current Value / Running Peak - 1)
     # This represents the largest peak-to-trough decline.
-    running_max = values.cummax()
-    drawdown = (values / running_max) - 1.0
-    max_drawdown = drawdown.min()
+    # Skipped when the caller already has it (compute_strategy returns it).
+    if max_drawdown is None:
+        max_drawdown = compute_max_drawdown(values)
 
     # RETURN METRICS DICTIONARY
     metrics = {
@@ -69,6 +94,19 @@ def compute_metrics(
     return metrics
 
 
+def compute_metrics(
+    portfolio_returns: ArrayLike,
+    portfolio_value: ArrayLike,
+    trading_days_per_year: int = 252,
+    max_drawdown: Optional[float] = None
+) -> Dict[str, float]:
+    """Computes standard portfolio performance metrics."""
+    returns, values = _prep_inputs(portfolio_returns, portfolio_value)
+    return _core_metrics(
+        returns, values, returns.std(ddof=1), trading_days_per_year, max_drawdown
+    )
+
+
 def print_metrics(metrics_dict: Dict[str, float], strategy_name: str = "Strategy") -> None:
     """Prints portfolio metrics in a formatted table."""
     print(f"{strategy_name.upper():^50}")
@@ -84,20 +122,16 @@ def print_metrics(metrics_dict: Dict[str, float], strategy_name: str = "Strategy
     print(f"{'Maximum Drawdown':<30} {max_drawdown:>10.2%}")
 
 
-def compute_sharpe_ratio(
-    portfolio_returns: pd.Series,
-    risk_free_rate: float = 0.0,
-    trading_days_per_year: int = 252
+def _sharpe_from_moments(
+    mean: float,
+    std: float,
+    risk_free_rate: float,
+    trading_days_per_year: int
 ) -> float:
-    """Computes annualized Sharpe Ratio."""
-    returns = portfolio_returns.dropna()
-
-    if returns.empty:
-        return np.nan
-
+    """Annualized Sharpe Ratio from the daily mean and standard deviation."""
     # Annualized return and volatility
-    annual_return = returns.mean() * trading_days_per_year
-    annual_volatility = returns.std() * np.sqrt(trading_days_per_year)
+    annual_return = mean * trading_days_per_year
+    annual_volatility = std * np.sqrt(trading_days_per_year)
 
     # Avoid division by zero
     if annual_volatility == 0:
@@ -109,27 +143,77 @@ def compute_sharpe_ratio(
     return float(sharpe)
 
 
-def compute_sortino_ratio(
-    portfolio_returns: pd.Series,
-    target_return: float = 0.0,
-    trading_days_per_year: int = 252
+def _sortino_from_returns(
+    returns: np.ndarray,
+    mean: float,
+    target_return: float,
+    trading_days_per_year: int
 ) -> float:
-    """Computes annualized Sortino Ratio."""
-    returns = portfolio_returns.dropna()
-
-    if returns.empty:
-        return np.nan
-
-    annual_return = returns.mean() * trading_days_per_year
+    """Annualized Sortino Ratio from prepared returns and their daily mean."""
+    annual_return = mean * trading_days_per_year
     downside_returns = returns[returns < target_return]
-    if downside_returns.empty:
+    if downside_returns.size == 0:
         return np.inf if annual_return > target_return else 0.0
 
 
-    downside_deviation = downside_returns.std() * np.sqrt(trading_days_per_year)
+    downside_deviation = downside_returns.std(ddof=1) * np.sqrt(trading_days_per_year)
     # Avoid division by zero
     if downside_deviation == 0:
         return np.inf if annual_return > target_return else 0.0
 
     sortino = (annual_return - target_return) / downside_deviation
     return float(sortino)
+
+
+def compute_sharpe_ratio(
+    portfolio_returns: ArrayLike,
+    risk_free_rate: float = 0.0,
+    trading_days_per_year: int = 252
+) -> float:
+    """Computes annualized Sharpe Ratio."""
+    returns = _prep(portfolio_returns)
+
+    if returns.size == 0:
+        return np.nan
+
+    return _sharpe_from_moments(
+        returns.mean(), returns.std(ddof=1), risk_free_rate, trading_days_per_year
+    )
+
+
+def compute_sortino_ratio(
+    portfolio_returns: ArrayLike,
+    target_return: float = 0.0,
+    trading_days_per_year: int = 252
+) -> float:
+    """Computes annualized Sortino Ratio."""
+    returns = _prep(portfolio_returns)
+
+    if returns.size == 0:
+        return np.nan
+
+    return _sortino_from_returns(returns, returns.mean(), target_return, trading_days_per_year)
+
+
+def compute_all_metrics(
+    portfolio_returns: ArrayLike,
+    portfolio_value: ArrayLike,
+    risk_free_rate: float = 0.0,
+    target_return: float = 0.0,
+    trading_days_per_year: int = 252,
+    max_drawdown: Optional[float] = None
+) -> Dict[str, float]:
+    """Computes core metrics plus Sharpe and Sortino ratios in one call.
+
+    The returns are prepared once and their mean and standard deviation are
+    shared by volatility, Sharpe and Sortino instead of being recomputed.
+    """
+    returns, values = _prep_inputs(portfolio_returns, portfolio_value)
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+
+    metrics = _core_metrics(returns, values, std, trading_days_per_year, max_drawdown)
+    metrics['sharpe_ratio'] = _sharpe_from_moments(mean, std, risk_free_rate, trading_days_per_year)
+    metrics['sortino_ratio'] = _sortino_from_returns(returns, mean, target_return, trading_days_per_year)
+
+    return metrics
@@ -2,67 +2,155 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
 
+from metrics import compute_max_drawdown
+
+
+@dataclass(frozen=True)
+class _StrategyInputs:
+    """Lookback-independent arrays shared by every strategy run on one frame."""
+    index: pd.Index
+    asset_cols: List[str]
+    prices: np.ndarray
+    daily_returns: np.ndarray
+    rebalance_positions: np.ndarray
+    holding_idx: np.ndarray
 
-def compute_strategy(df: pd.DataFrame, lookback_days: int) -> Dict[str, pd.Series | pd.DataFrame]:
-    """Computes a momentum-based portfolio strategy with monthly rebalancing."""
-    
 
+def _prepare_inputs(df: pd.DataFrame) -> _StrategyInputs:
+    """Extracts prices, daily returns and the monthly rebalance schedule."""
     # Step 1: Identify asset columns (all except the first Date column)
     date_col = df.columns[0]
     asset_cols = df.columns[1:].tolist()
 
-    data = df.copy()
-    data[date_col] = pd.to_datetime(data[date_col])
+    # The frame is used as-is (Date already datetime, see load_data) and never mutated;
+    # all computation below runs on plain NumPy arrays.
+    # pandas stores each column contiguously, so the matrix comes back in Fortran
+    # order; make it row-major so per-day rows (and the arrays derived from it via
+    # full_like) are contiguous for the row-wise ranking and gathers below.
+    prices_64 = np.ascontiguousarray(df[asset_cols].to_numpy(dtype=np.float64))
+    n_days = prices_64.shape[0]
 
     # Step 2: Compute daily returns for each asset
     # Return_t = (Price_t / Price_{t-1}) - 1
-    daily_returns = data[asset_cols].pct_change()
-
-    # Step 3: Compute momentum scores (lookback period return)
+    # Kept in float64 so portfolio returns and values match the full-precision result
+    daily_returns = np.full_like(prices_64, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_returns[1:] = prices_64[1:] / prices_64[:-1] - 1
+
+    # Momentum only ranks assets, for which float32 is ample precision and halves
+    # the bytes per pass
+    prices = prices_64.astype(np.float32)
+
+    # Step 3: Identify rebalance dates (first trading day of each month)
+    # The first occurrence of each calendar month marks a rebalance
+    year_month = df[date_col].to_numpy().astype('datetime64[M]')
+    rebalance_positions = np.sort(np.unique(year_month, return_index=True)[1])
+
+    # Map every day to the index of the latest rebalance on or before it
+    holding_idx = np.zeros(n_days, dtype=np.int64)
+    holding_idx[rebalance_positions] = np.arange(len(rebalance_positions))
+    np.maximum.accumulate(holding_idx, out=holding_idx)
+
+    return _StrategyInputs(
+        index=df.index,
+        asset_cols=asset_cols,
+        prices=prices,
+        daily_returns=daily_returns,
+        rebalance_positions=rebalance_positions,
+        holding_idx=holding_idx
+    )
+
+
+def _run_strategy(inputs: _StrategyInputs, lookback_days: int) -> Dict[str, pd.Series | np.ndarray | float]:
+    """Runs the lookback-dependent part of the strategy on prepared inputs."""
+    prices = inputs.prices
+    daily_returns = inputs.daily_returns
+    n_days = prices.shape[0]
+
+    # Step 4: Compute momentum scores (lookback period return)
     # Momentum_t = (Price_t / Price_{t-lookback_days}) - 1
-    # Using shift to look back exactly lookback_days trading days
-    momentum_scores = (data[asset_cols] / data[asset_cols].shift(lookback_days)) - 1
-
-    # Step 4: Identify rebalance dates (first trading day of each month)
-    # Use period grouping to detect month boundaries using the Date column
-    data['year_month'] = data[date_col].dt.to_period('M')
-    rebalance_mask = data.groupby('year_month').cumcount() == 0
-    rebalance_indices = data.loc[rebalance_mask].index.tolist()
-
-    # Step 5: Initialize weights dataframe with zeros
-    # This will be populated at each rebalance date
-    weights = pd.DataFrame(0.0, index=data.index, columns=asset_cols)
-
-    # Assign weights at each rebalance date, holding until next rebalance
-    for i, rebal_pos in enumerate(rebalance_indices):
-        momentum_row = momentum_scores.iloc[rebal_pos]
-
-        # Only assign weights if we have valid momentum data for at least 2 assets
-        valid_momentum_count = momentum_row.notna().sum()
-        if valid_momentum_count >= 2:
-            # Rank assets by momentum and select top 2
-            top_2_assets = momentum_row.nlargest(2).index.tolist()
-
-            # Determine the date range where these weights apply
-            start_pos = rebal_pos
-            end_pos = rebalance_indices[i + 1] if i + 1 < len(rebalance_indices) else len(data)
-
-            # Assign equal weights (0.5 each) to top 2 assets for this holding period
-            for asset in top_2_assets:
-                weights.iloc[start_pos:end_pos, weights.columns.get_loc(asset)] = 0.5
-
-    # Step 5: Compute daily portfolio returns
-    # Portfolio Return_t = sum(Asset_Return_t * Weight_t) across all assets
-    portfolio_returns = (daily_returns * weights).sum(axis=1)
-
-    # Step 6: Compute cumulative portfolio value
+    # Only the rebalance rows are ever ranked, so only those are computed
+    rebalance_positions = inputs.rebalance_positions
+    rebalance_momentum = np.full(
+        (len(rebalance_positions), len(inputs.asset_cols)), np.nan, dtype=prices.dtype
+    )
+    has_history = (rebalance_positions >= lookback_days) & (rebalance_positions - lookback_days < n_days)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rebalance_momentum[has_history] = (
+            prices[rebalance_positions[has_history]]
+            / prices[rebalance_positions[has_history] - lookback_days]
+            - 1
+        )
+
+    # Step 5: Select the top 2 assets at every rebalance date in one vectorized pass
+    # Only assign weights where at least 2 assets have valid momentum data
+    has_two_valid = np.count_nonzero(~np.isnan(rebalance_momentum), axis=1) >= 2
+    ranked_momentum = np.where(np.isnan(rebalance_momentum), -np.inf, rebalance_momentum)
+
+    # Equal weights (0.5 each) for the top 2 assets of each rebalance row, stored
+    # sparsely as the two selected column indices (-1 marks a cash slot)
+    n_assets = len(inputs.asset_cols)
+    rebalance_idx = np.full((len(rebalance_positions), 2), -1, dtype=np.int32)
+    if n_assets >= 2:
+        top_2_idx = np.argpartition(-ranked_momentum, 1, axis=1)[:, :2]
+        rebalance_idx[has_two_valid] = top_2_idx[has_two_valid]
+
+    # Hold each rebalance's selection until the next rebalance date
+    weights_idx = rebalance_idx[inputs.holding_idx]
+    held = weights_idx >= 0
+
+    # Step 6: Compute daily portfolio returns
+    # Portfolio Return_t = sum(Asset_Return_t * Weight_t) across all assets,
+    # i.e. 0.5 * (sum of the two held assets' returns): two gathers per day
+    held_returns = np.take_along_axis(
+        daily_returns, np.where(held, weights_idx, 0), axis=1
+    )
+    # Cash slots and undefined asset returns (e.g. the first day) contribute 0,
+    # as in pandas' sum
+    held_returns[~held | np.isnan(held_returns)] = 0.0
+    portfolio_returns = 0.5 * held_returns.sum(axis=1)
+
+    # Step 7: Compute cumulative portfolio value
     # Value_t = 1.0 * prod(1 + Return_i) for i = 1 to t
-    portfolio_value = (1 + portfolio_returns).cumprod()
+    # (accumulated in place, so only one buffer is allocated)
+    portfolio_value = np.add(portfolio_returns, 1.0)
+    np.multiply.accumulate(portfolio_value, out=portfolio_value)
+
+    # Step 8: Maximum drawdown of the value path, computed once here so
+    # compute_metrics can reuse it instead of rescanning portfolio_value
+    max_drawdown = compute_max_drawdown(portfolio_value) if n_days else np.nan
 
+    # Wrap results back into pandas at the boundary, aligned to the input index
     return {
-        'portfolio_returns': portfolio_returns,
-        'portfolio_value': portfolio_value,
-        'weights': weights
+        'portfolio_returns': pd.Series(portfolio_returns, index=inputs.index),
+        'portfolio_value': pd.Series(portfolio_value, index=inputs.index),
+        'weights_idx': weights_idx,
+        'max_drawdown': max_drawdown
     }
+
+
+def weights_from_idx(weights_idx: np.ndarray, index: pd.Index, asset_cols: List[str]) -> pd.DataFrame:
+    """Expands the sparse top-2 selection (-1 = cash) into a dense N x K weights frame."""
+    # Built only for reporting, on demand; float64 like the rest of the public
+    # results (0 and 0.5 are exact, so nothing is lost)
+    held = weights_idx >= 0
+    weights = np.zeros((len(index), len(asset_cols)), dtype=np.float64)
+    weights[np.nonzero(held)[0], weights_idx[held]] = 0.5
+    return pd.DataFrame(weights, index=index, columns=asset_cols)
+
+
+def compute_strategy(df: pd.DataFrame, lookback_days: int) -> Dict[str, pd.Series | np.ndarray | float]:
+    """Computes a momentum-based portfolio strategy with monthly rebalancing."""
+    return _run_strategy(_prepare_inputs(df), lookback_days)
+
+
+def compute_strategies(
+    df: pd.DataFrame,
+    lookback_periods: Iterable[int]
+) -> Dict[int, Dict[str, pd.Series | np.ndarray | float]]:
+    """Runs compute_strategy for several lookbacks, preparing the shared inputs once."""
+    inputs = _prepare_inputs(df)
+    return {lookback_days: _run_strategy(inputs, lookback_days) for lookback_days in lookback_periods}